@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration for the Aura Bank ML API
+Usage: gunicorn -c gunicorn.conf.py ml_api:app
+"""
+
+import os
+
+bind = os.environ.get('ML_API_BIND', '0.0.0.0:5001')
+
+# Threaded workers: a request blocked inside a model call (or waiting on the
+# micro-batching queue) no longer stalls the worker, and concurrent requests
+# can be coalesced into a single batch
+worker_class = 'gthread'
+threads = int(os.environ.get('ML_API_THREADS', 16))
+
+# A single process by default: user corrections live in an in-memory dict in
+# ml_api.py, so with several workers a correction saved through one would be
+# invisible to the others. The threads above provide the request concurrency
+workers = int(os.environ.get('ML_API_WORKERS', 1))
+
+# Load the app (and models) once in the master before forking, so workers
+# share the model memory copy-on-write instead of each loading their own
+preload_app = True
@@ -9,11 +9,36 @@ Provides endpoints for:
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import joblib
-import pickle
-import pandas as pd
 import numpy as np
 import os
+import queue
+import re
+import threading
+import time
 import warnings
+from collections import OrderedDict
+from typing import Union
+
+import msgspec
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+try:
+    import tl2cgen  # Optional: serves the compiled fraud model (fraud.so)
+except ImportError:
+    tl2cgen = None
+
+try:
+    import ahocorasick  # Optional: faster keyword fallback matching
+except ImportError:
+    ahocorasick = None
+
+try:
+    from numba import njit  # Optional: compiles the loan math to native code
+except ImportError:
+    def njit(*args, **kwargs):
+        """No-op stand-in so decorated functions run as plain Python"""
+        return lambda func: func
 
 warnings.filterwarnings('ignore')
 
@@ -25,10 +50,23 @@ MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Load models
 fraud_model = None
+fraud_predictor = None  # Compiled (Treelite) fraud model, preferred when available
 loan_model = None
 expense_classifier = None
 expense_vectorizer = None
 
+# Fraud model input columns: Time, V1-V28 (PCA components), Amount
+FRAUD_FEATURES = ('Time',) + tuple(f'V{i}' for i in range(1, 29)) + ('Amount',)
+
+# Loan model input columns, in the order the model was trained on
+LOAN_FEATURE_ORDER = [
+    'Dependents', 'ApplicantIncome', 'CoapplicantIncome', 'LoanAmount',
+    'Loan_Amount_Term', 'Credit_History', 'Total_Income', 'EMI',
+    'Income_to_Loan', 'Loan_per_person', 'Gender_Male', 'Married_Yes',
+    'Education_Not Graduate', 'Self_Employed_Yes',
+    'Property_Area_Semiurban', 'Property_Area_Urban'
+]
+
 # User corrections storage (in-memory, persists for session)
 # In production, this should be stored in a database or JSON file
 user_corrections = {}
@@ -58,13 +96,13 @@ def save_user_corrections():
 
 def load_models():
     """Load ML models on startup with robust error handling"""
-    global fraud_model, loan_model, expense_classifier, expense_vectorizer
+    global fraud_model, fraud_predictor, loan_model, expense_classifier, expense_vectorizer
     
     # Define model configurations
     models_config = {
         'fraud': {
             'filename': 'credit_card_model.pkl',
-            'loader': 'pickle',
+            'loader': 'joblib',
             'description': 'Fraud Detection Model'
         },
         'loan': {
@@ -74,12 +112,12 @@ def load_models():
         },
         'expense': {
             'filename': 'expense_classifier_clean.pkl',
-            'loader': 'pickle',
+            'loader': 'joblib',
             'description': 'Expense Classifier Model'
         },
         'vectorizer': {
             'filename': 'tfidf_vectorizer_clean.pkl',
-            'loader': 'pickle',
+            'loader': 'joblib',
             'description': 'TF-IDF Vectorizer'
         }
     }
@@ -101,11 +139,8 @@ def load_models():
             continue
         
         try:
-            if config['loader'] == 'pickle':
-                with open(path, 'rb') as f:
-                    model = pickle.load(f)
-            else:
-                model = joblib.load(path)
+            # joblib reads both plain pickles and lz4-compressed dumps
+            model = joblib.load(path)
             
             # Assign to global variables
             if name == 'fraud':
@@ -124,6 +159,16 @@ def load_models():
             print(f"❌ {config['description']}: Load failed")
             print(f"    Error: {str(e)}")
     
+    # Compiled fraud model (built by create_fraud_model.py when treelite is installed)
+    compiled_path = os.path.join(MODEL_DIR, 'fraud.so')
+    if tl2cgen is not None and os.path.exists(compiled_path):
+        try:
+            fraud_predictor = tl2cgen.Predictor(compiled_path)
+            print("✅ Compiled Fraud Model: Loaded successfully")
+        except Exception as e:
+            print("❌ Compiled Fraud Model: Load failed")
+            print(f"    Error: {str(e)}")
+    
     print(f"\n📊 Models loaded: {loaded_count}/{total_count}")
     print("="*50 + "\n")
     
@@ -134,6 +179,212 @@ def load_models():
 load_models()
 
 
+# ==========================================
+# MICRO-BATCHING
+# ==========================================
+# Concurrent single-row requests are coalesced into one model call, so the
+# per-call sklearn overhead is paid once per batch instead of once per request.
+MAX_BATCH = 64
+MAX_WAIT_MS = 10
+
+
+class BatchQueue:
+    """Collect concurrent prediction requests and score them as one batch"""
+
+    def __init__(self, predict_batch, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.predict_batch = predict_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def _ensure_worker(self):
+        # Started lazily so every server process gets its own worker thread
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def submit(self, item):
+        """Queue a single item and block until its batch has been scored"""
+        self._ensure_worker()
+        event = threading.Event()
+        result_slot = {}
+        self._queue.put((item, event, result_slot))
+        event.wait()
+        if 'error' in result_slot:
+            raise result_slot['error']
+        return result_slot['result']
+
+    def _run(self):
+        while True:
+            # Block for the first item, then drain until the batch is full
+            # or the wait budget is spent - whichever comes first
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self.predict_batch([item for item, _, _ in batch])
+                for (_, _, result_slot), result in zip(batch, results):
+                    result_slot['result'] = result
+            except Exception as e:
+                for _, _, result_slot in batch:
+                    result_slot['error'] = e
+
+            for _, event, _ in batch:
+                event.set()
+
+
+# Set by warm_up_models once fraud_forest_proba has been checked against predict_proba
+fraud_fast_path = False
+
+
+def fraud_forest_proba(X):
+    """RandomForest predict_proba specialized for our fixed float32 (n, 30) input:
+    averages the trees directly, skipping the per-call validation and joblib dispatch"""
+    proba = np.zeros((len(X), fraud_model.n_classes_))
+    for tree in fraud_model.estimators_:
+        proba += tree.predict_proba(X, check_input=False)
+    proba /= len(fraud_model.estimators_)
+    return proba
+
+
+def predict_fraud_proba_batch(rows):
+    """Score stacked fraud feature rows with a single predict_proba call"""
+    X = np.vstack(rows)
+    if fraud_predictor is not None:
+        # Compiled trees: one native call, no per-estimator Python dispatch
+        return fraud_predictor.predict(tl2cgen.DMatrix(X.astype(np.float32, copy=False))).reshape(len(X), -1)
+    if fraud_fast_path:
+        return fraud_forest_proba(np.ascontiguousarray(X, dtype=np.float32))
+    return fraud_model.predict_proba(X)
+
+
+def expense_probs_are_softmax():
+    """True when the expense classifier's probabilities are a softmax over its
+    decision_function scores (multinomial logistic regression, 3+ classes)"""
+    if not isinstance(expense_classifier, LogisticRegression) or len(expense_classifier.classes_) < 3:
+        return False
+    multi_class = getattr(expense_classifier, 'multi_class', 'auto')
+    return multi_class == 'multinomial' or (multi_class != 'ovr' and expense_classifier.solver != 'liblinear')
+
+
+def vectorize_expenses(descriptions):
+    """TF-IDF matrix for descriptions. For a hashing + TF-IDF pipeline the
+    fresh count matrix is scaled and normalized in place instead of copied."""
+    if isinstance(expense_vectorizer, Pipeline):
+        counts = expense_vectorizer[:-1].transform(descriptions)
+        return expense_vectorizer[-1].transform(counts, copy=False)
+    return expense_vectorizer.transform(descriptions)
+
+
+def categorize_expense_batch(descriptions):
+    """Vectorize and classify descriptions with a single transform/predict call.
+    All expense ML paths go through here, so each micro-batch or
+    /categorize_batch request builds one sparse TF-IDF matrix, not one per row."""
+    X = vectorize_expenses(descriptions)
+    
+    if expense_probs_are_softmax():
+        # Only the winning class's probability is needed:
+        # softmax(s)[top] = 1 / sum(exp(s - s[top])), no full normalization
+        scores = expense_classifier.decision_function(X)
+        top = scores.argmax(axis=1)
+        # Shift and exponentiate in place, reusing the score buffer
+        scores -= scores[np.arange(len(top)), top][:, np.newaxis]
+        np.exp(scores, out=scores)
+        confidences = 100 / scores.sum(axis=1)
+    else:
+        probs = expense_classifier.predict_proba(X)
+        top = probs.argmax(axis=1)
+        confidences = probs.max(axis=1) * 100
+    
+    predictions = expense_classifier.classes_[top]
+    return [(prediction, float(confidence)) for prediction, confidence in zip(predictions, confidences)]
+
+
+def warm_up_models():
+    """Run one dummy prediction per model so lazy initialization happens at
+    startup - under gunicorn --preload that is before workers are forked"""
+    global fraud_fast_path
+    try:
+        # Validate the specialized forest path once, instead of on every call
+        if fraud_model is not None and hasattr(fraud_model, 'estimators_'):
+            probe = np.random.RandomState(0).randn(16, len(FRAUD_FEATURES)).astype(np.float32)
+            fraud_fast_path = bool(np.allclose(fraud_forest_proba(probe), fraud_model.predict_proba(probe)))
+        
+        if fraud_model is not None or fraud_predictor is not None:
+            predict_fraud_proba_batch([np.zeros((1, len(FRAUD_FEATURES)), dtype=np.float32)])
+        if expense_classifier is not None and expense_vectorizer is not None:
+            categorize_expense_batch(['warm up'])
+        # The XGBoost loan model is left cold: starting its OpenMP thread pool
+        # in the master process can deadlock the forked workers
+    except Exception as e:
+        print(f"⚠ Model warm-up failed: {e}")
+
+
+warm_up_models()
+
+fraud_batch_queue = BatchQueue(predict_fraud_proba_batch)
+expense_batch_queue = BatchQueue(categorize_expense_batch)
+
+
+# ==========================================
+# EXPENSE PREDICTION CACHE
+# ==========================================
+# Expense descriptions repeat heavily ("Swiggy order", "Netflix subscription"),
+# so ML predictions are memoized on the normalized description.
+EXPENSE_CACHE_SIZE = 65536
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+expense_cache = LRUCache(EXPENSE_CACHE_SIZE)
+
+
+def normalize_description(description):
+    """Lowercase and collapse whitespace (the vectorizer ignores both)"""
+    return ' '.join(description.lower().split())
+
+
+def classify_expense(description_norm):
+    """Categorize a normalized description with the ML model, using the cache"""
+    result = expense_cache.get(description_norm)
+    if result is None:
+        result = expense_batch_queue.submit(description_norm)
+        expense_cache.put(description_norm, result)
+    return result
+
+
 # ==========================================
 # HEALTH CHECK
 # ==========================================
@@ -142,7 +393,7 @@ def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'OK',
-        'fraud_model_loaded': fraud_model is not None,
+        'fraud_model_loaded': fraud_model is not None or fraud_predictor is not None,
         'loan_model_loaded': loan_model is not None,
         'expense_model_loaded': expense_classifier is not None and expense_vectorizer is not None
     })
@@ -222,7 +473,7 @@ def predict_fraud():
             })
         
         # Full model prediction (requires V1-V28 PCA features)
-        if fraud_model is None:
+        if fraud_model is None and fraud_predictor is None:
             return jsonify({
                 'error': 'Fraud detection model not loaded',
                 'fallback': True,
@@ -230,26 +481,16 @@ def predict_fraud():
                 'fraud_probability': 0.0
             }), 503
         
-        # Build feature vector for fraud model
-        # Features: Time, V1-V28, Amount
-        features = []
-        feature_names = ['Time'] + [f'V{i}' for i in range(1, 29)] + ['Amount']
-        
-        for feat in feature_names:
-            value = data.get(feat, 0)
-            features.append(float(value) if value is not None else 0.0)
-        
-        # Create DataFrame with correct column names
-        X = pd.DataFrame([features], columns=feature_names)
+        # Build feature vector for fraud model (missing/null features are 0)
+        X = np.fromiter(
+            (float(data.get(feat) or 0) for feat in FRAUD_FEATURES),
+            dtype=np.float32, count=len(FRAUD_FEATURES)
+        ).reshape(1, -1)
         
-        # Predict
-        prediction = int(fraud_model.predict(X)[0])
-        
-        # Get probability if available
-        try:
-            probability = float(fraud_model.predict_proba(X)[0][1])
-        except:
-            probability = float(prediction)
+        # Predict (batched with concurrent requests)
+        probs = fraud_batch_queue.submit(X)
+        prediction = int(probs.argmax())
+        probability = float(probs[1])
         
         return jsonify({
             'is_fraud': bool(prediction),
@@ -265,6 +506,40 @@ def predict_fraud():
 # ==========================================
 # LOAN PREDICTION ENDPOINT
 # ==========================================
+class LoanRequest(msgspec.Struct):
+    """Loan application fields, decoded and type-coerced by msgspec"""
+    Gender: str = 'Male'
+    Married: str = 'No'
+    Dependents: Union[int, str] = 0
+    Education: str = 'Graduate'
+    Self_Employed: str = 'No'
+    ApplicantIncome: float = 0.0
+    CoapplicantIncome: float = 0.0
+    LoanAmount: float = 0.0
+    Loan_Amount_Term: float = 360.0
+    Credit_History: float = 1.0
+    Property_Area: str = 'Urban'
+
+    def __post_init__(self):
+        # Handle '3+' dependents
+        if isinstance(self.Dependents, str):
+            self.Dependents = 3 if self.Dependents == '3+' else int(self.Dependents)
+
+
+class LoanBatchItem(LoanRequest):
+    """A loan application inside a /predict_loan_batch request"""
+    id: Union[int, str, None] = None
+
+
+class LoanBatchRequest(msgspec.Struct):
+    applications: list[LoanBatchItem] = []
+
+
+# strict=False accepts numbers sent as strings, like the old float() calls
+loan_request_decoder = msgspec.json.Decoder(LoanRequest, strict=False)
+loan_batch_decoder = msgspec.json.Decoder(LoanBatchRequest, strict=False)
+
+
 @app.route('/predict_loan', methods=['POST'])
 def predict_loan():
     """
@@ -286,24 +561,24 @@ def predict_loan():
     }
     """
     try:
-        data = request.json
+        raw = request.get_data()
         
-        if not data:
+        # An empty body or empty object would otherwise decode to all defaults
+        if raw.translate(None, b' \t\r\n') in (b'', b'{}'):
             return jsonify({'error': 'No input data provided'}), 400
         
-        # Extract and validate input
-        applicant_income = float(data.get('ApplicantIncome', 0))
-        coapplicant_income = float(data.get('CoapplicantIncome', 0))
-        loan_amount = float(data.get('LoanAmount', 0))
-        loan_term = float(data.get('Loan_Amount_Term', 360))
-        credit_history = float(data.get('Credit_History', 1))
-        dependents = data.get('Dependents', 0)
+        # Parse and validate input straight from the JSON body
+        try:
+            req = loan_request_decoder.decode(raw)
+        except msgspec.DecodeError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Handle '3+' dependents
-        if isinstance(dependents, str):
-            dependents = 3 if dependents == '3+' else int(dependents)
-        else:
-            dependents = int(dependents)
+        applicant_income = req.ApplicantIncome
+        coapplicant_income = req.CoapplicantIncome
+        loan_amount = req.LoanAmount
+        loan_term = req.Loan_Amount_Term
+        credit_history = req.Credit_History
+        dependents = req.Dependents
         
         # Feature engineering (matching training pipeline)
         total_income = applicant_income + coapplicant_income
@@ -335,30 +610,28 @@ def predict_loan():
                     'Income_to_Loan': income_to_loan,
                     'Loan_per_person': loan_per_person,
                     # One-hot encoded categorical features
-                    'Gender_Male': 1 if data.get('Gender', 'Male') == 'Male' else 0,
-                    'Married_Yes': 1 if data.get('Married', 'No') == 'Yes' else 0,
-                    'Education_Not Graduate': 1 if data.get('Education', 'Graduate') == 'Not Graduate' else 0,
-                    'Self_Employed_Yes': 1 if data.get('Self_Employed', 'No') == 'Yes' else 0,
-                    'Property_Area_Semiurban': 1 if data.get('Property_Area', 'Urban') == 'Semiurban' else 0,
-                    'Property_Area_Urban': 1 if data.get('Property_Area', 'Urban') == 'Urban' else 0,
+                    'Gender_Male': 1 if req.Gender == 'Male' else 0,
+                    'Married_Yes': 1 if req.Married == 'Yes' else 0,
+                    'Education_Not Graduate': 1 if req.Education == 'Not Graduate' else 0,
+                    'Self_Employed_Yes': 1 if req.Self_Employed == 'Yes' else 0,
+                    'Property_Area_Semiurban': 1 if req.Property_Area == 'Semiurban' else 0,
+                    'Property_Area_Urban': 1 if req.Property_Area == 'Urban' else 0,
                 }
                 
-                # Create DataFrame
-                X = pd.DataFrame([features])
+                X = np.fromiter(
+                    (features[k] for k in LOAN_FEATURE_ORDER),
+                    dtype=np.float32, count=len(LOAN_FEATURE_ORDER)
+                ).reshape(1, -1)
                 
-                # Predict
-                prediction = int(loan_model.predict(X)[0])
-                
-                # Get probability if available
-                try:
-                    probability = float(loan_model.predict_proba(X)[0][1])
-                except:
-                    probability = float(prediction)
+                # Predict (one predict_proba call; the label is its argmax)
+                probs = loan_model.predict_proba(X)[0]
+                prediction = int(probs.argmax())
+                probability = float(probs[1])
                 
                 return jsonify({
                     'is_approved': bool(prediction),
                     'approval_probability': round(probability, 4),
-                    'risk_assessment': get_risk_factors(data, emi, income_to_loan, credit_history),
+                    'risk_assessment': get_risk_factors(total_income, emi, income_to_loan, credit_history),
                     'model_type': 'ml_model'
                 })
                 
@@ -397,15 +670,15 @@ def predict_loan():
                 score -= 0.1
         
         # Education bonus
-        if data.get('Education', 'Graduate') == 'Graduate':
+        if req.Education == 'Graduate':
             score += 0.05
         
         # Married with coapplicant income
-        if data.get('Married', 'No') == 'Yes' and coapplicant_income > 0:
+        if req.Married == 'Yes' and coapplicant_income > 0:
             score += 0.05
         
         # Property area (semiurban has highest approval rate historically)
-        property_area = data.get('Property_Area', 'Urban')
+        property_area = req.Property_Area
         if property_area == 'Semiurban':
             score += 0.05
         elif property_area == 'Rural':
@@ -417,7 +690,7 @@ def predict_loan():
         return jsonify({
             'is_approved': score >= 0.5,
             'approval_probability': round(score, 4),
-            'risk_assessment': get_risk_factors(data, emi, income_to_loan, credit_history),
+            'risk_assessment': get_risk_factors(total_income, emi, income_to_loan, credit_history),
             'model_type': 'heuristic'
         })
         
@@ -425,7 +698,7 @@ def predict_loan():
         return jsonify({'error': str(e)}), 500
 
 
-def get_risk_factors(data, emi, income_to_loan, credit_history):
+def get_risk_factors(total_income, emi, income_to_loan, credit_history):
     """Generate risk assessment breakdown"""
     factors = []
     
@@ -464,7 +737,7 @@ def get_risk_factors(data, emi, income_to_loan, credit_history):
         })
     
     # EMI analysis
-    monthly_income = (float(data.get('ApplicantIncome', 0)) + float(data.get('CoapplicantIncome', 0))) / 12
+    monthly_income = total_income / 12
     if monthly_income > 0:
         emi_percent = (emi / monthly_income) * 100
         if emi_percent < 30:
@@ -499,29 +772,22 @@ def predict_fraud_batch():
         data = request.json
         transactions = data.get('transactions', [])
         
-        results = []
-        for tx in transactions:
-            # Use simplified scoring for batch
-            amount = float(tx.get('Amount', tx.get('amount', 0)))
-            
-            risk_score = 0.0
-            if amount > 5000:
-                risk_score += 0.3
-            elif amount > 2000:
-                risk_score += 0.15
-            if amount < 1 or amount > 10000:
-                risk_score += 0.2
-            if tx.get('is_foreign', False):
-                risk_score += 0.15
-                
-            risk_score = min(risk_score, 0.95)
-            
-            results.append({
-                'transaction_id': tx.get('id', tx.get('transaction_id')),
-                'is_fraud': risk_score > 0.5,
-                'fraud_probability': round(risk_score, 4),
-                'risk_level': 'HIGH' if risk_score > 0.7 else 'MEDIUM' if risk_score > 0.4 else 'LOW'
-            })
+        # Use simplified scoring for batch, vectorized over all transactions
+        n = len(transactions)
+        amounts = np.fromiter((float(tx.get('Amount', tx.get('amount', 0))) for tx in transactions), dtype=np.float64, count=n)
+        is_foreign = np.fromiter((bool(tx.get('is_foreign', False)) for tx in transactions), dtype=bool, count=n)
+        
+        risk_scores = np.where(amounts > 5000, 0.3, np.where(amounts > 2000, 0.15, 0.0))
+        risk_scores += np.where((amounts < 1) | (amounts > 10000), 0.2, 0.0)
+        risk_scores += np.where(is_foreign, 0.15, 0.0)
+        np.minimum(risk_scores, 0.95, out=risk_scores)
+        
+        results = [{
+            'transaction_id': tx.get('id', tx.get('transaction_id')),
+            'is_fraud': risk_score > 0.5,
+            'fraud_probability': round(risk_score, 4),
+            'risk_level': 'HIGH' if risk_score > 0.7 else 'MEDIUM' if risk_score > 0.4 else 'LOW'
+        } for tx, risk_score in zip(transactions, risk_scores.tolist())]
         
         return jsonify({
             'success': True,
@@ -534,9 +800,90 @@ def predict_fraud_batch():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/predict_loan_batch', methods=['POST'])
+def predict_loan_batch():
+    """Batch heuristic loan scoring, vectorized over all applications"""
+    try:
+        try:
+            applications = loan_batch_decoder.decode(request.get_data() or b'{}').applications
+        except msgspec.DecodeError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        n = len(applications)
+        
+        def column(field, dtype=np.float64):
+            return np.fromiter((getattr(application, field) for application in applications), dtype=dtype, count=n)
+        
+        applicant_income = column('ApplicantIncome')
+        coapplicant_income = column('CoapplicantIncome')
+        loan_amount = column('LoanAmount')
+        loan_term = column('Loan_Amount_Term')
+        credit_history = column('Credit_History')
+        education = column('Education', dtype=object)
+        married = column('Married', dtype=object)
+        property_area = column('Property_Area', dtype=object)
+        
+        # Same feature engineering and division-by-zero guards as /predict_loan
+        total_income = applicant_income + coapplicant_income
+        loan_term[loan_term == 0] = 360
+        loan_amount[loan_amount == 0] = 1
+        emi = loan_amount / loan_term
+        income_to_loan = total_income / (loan_amount + 1)
+        monthly_income = total_income / 12
+        has_income = monthly_income > 0
+        emi_ratio = emi / np.where(has_income, monthly_income, 1)
+        
+        # Each term mirrors one rule of the single-application heuristic,
+        # added in the same order so the scores are identical
+        score = np.full(n, 0.5)
+        score += np.where(credit_history == 1, 0.25, -0.35)
+        score += np.select(
+            [income_to_loan > 10, income_to_loan > 5, income_to_loan > 2, income_to_loan < 1],
+            [0.15, 0.1, 0.05, -0.15], default=0.0
+        )
+        score += np.select(
+            [has_income & (emi_ratio < 0.2), has_income & (emi_ratio < 0.4), has_income & (emi_ratio > 0.5)],
+            [0.1, 0.05, -0.1], default=0.0
+        )
+        score += np.where(education == 'Graduate', 0.05, 0.0)
+        score += np.where((married == 'Yes') & (coapplicant_income > 0), 0.05, 0.0)
+        score += np.select([property_area == 'Semiurban', property_area == 'Rural'], [0.05, -0.05], default=0.0)
+        np.clip(score, 0.05, 0.95, out=score)
+        
+        results = [{
+            'id': application.id,
+            'is_approved': approval_probability >= 0.5,
+            'approval_probability': round(approval_probability, 4),
+            'model_type': 'heuristic'
+        } for application, approval_probability in zip(applications, score.tolist())]
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'total': len(results),
+            'approved': sum(1 for r in results if r['is_approved'])
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ==========================================
 # LOAN CALCULATOR ENDPOINT
 # ==========================================
+@njit(cache=True)
+def compute_emi(principal, monthly_rate, months):
+    """EMI calculation: P × r × (1 + r)^n / ((1 + r)^n - 1)"""
+    if monthly_rate > 0:
+        growth = (1 + monthly_rate) ** months
+        return principal * monthly_rate * growth / (growth - 1)
+    return principal / months
+
+
+# Compile at import rather than on the first request
+compute_emi(1.0, 0.01, 12.0)
+
+
 @app.route('/calculate_loan', methods=['POST'])
 def calculate_loan():
     """Calculate loan EMI and total payment"""
@@ -553,11 +900,8 @@ def calculate_loan():
         # Monthly interest rate
         monthly_rate = annual_rate / 12
         
-        # EMI calculation: P × r × (1 + r)^n / ((1 + r)^n - 1)
-        if monthly_rate > 0:
-            emi = principal * monthly_rate * pow(1 + monthly_rate, months) / (pow(1 + monthly_rate, months) - 1)
-        else:
-            emi = principal / months
+        # months is passed as a float so the JIT uses pow() like plain Python
+        emi = float(compute_emi(principal, monthly_rate, float(months)))
         
         total_payment = emi * months
         total_interest = total_payment - principal
@@ -593,52 +937,60 @@ CATEGORY_METADATA = {
     'Others': {'icon': 'category', 'color': '#6b7280'}
 }
 
+# Fallback keyword rules, in priority order (the first matching category wins)
+CATEGORY_KEYWORDS = [
+    ('Food & Dining', ['swiggy', 'zomato', 'restaurant', 'cafe', 'food', 'pizza',
+                       'burger', 'coffee', 'dinner', 'lunch', 'breakfast',
+                       'mcdonald', 'starbucks', 'domino', 'kfc', 'subway']),
+    ('Transportation', ['uber', 'ola', 'rapido', 'metro', 'petrol', 'fuel',
+                        'gas station', 'parking', 'toll', 'cab', 'taxi',
+                        'bus', 'train', 'flight', 'airline']),
+    ('Shopping', ['amazon', 'flipkart', 'myntra', 'shopping', 'store',
+                  'mart', 'purchase', 'order', 'delivery', 'grocery']),
+    ('Bills & Utilities', ['electricity', 'water bill', 'internet', 'broadband',
+                           'mobile recharge', 'rent', 'maintenance', 'utility',
+                           'gas bill', 'phone bill', 'dth']),
+    ('Entertainment', ['netflix', 'spotify', 'movie', 'cinema', 'game',
+                       'hotstar', 'prime', 'youtube', 'concert', 'show']),
+    ('Healthcare', ['hospital', 'doctor', 'pharmacy', 'medicine', 'medical',
+                    'clinic', 'health', 'dental', 'lab test']),
+    ('Education', ['course', 'tuition', 'school', 'college', 'book',
+                   'udemy', 'coursera', 'education', 'training']),
+    ('Travel', ['hotel', 'booking', 'airbnb', 'makemytrip',
+                'goibibo', 'travel', 'vacation', 'trip']),
+]
+
+# Keyword -> priority of the highest-ranked category that lists it
+KEYWORD_PRIORITY = {}
+for priority, (_, keywords) in enumerate(CATEGORY_KEYWORDS):
+    for kw in keywords:
+        KEYWORD_PRIORITY.setdefault(kw, priority)
+
+
+def build_keyword_matcher():
+    """Compile every fallback keyword into one matcher that scans a description once"""
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for kw, priority in KEYWORD_PRIORITY.items():
+            automaton.add_word(kw, priority)
+        automaton.make_automaton()
+        return lambda text: (priority for _, priority in automaton.iter(text))
+    
+    # Without pyahocorasick, a lookahead alternation still reports every
+    # (possibly overlapping) keyword in a single pass over the text
+    ordered = sorted(KEYWORD_PRIORITY, key=KEYWORD_PRIORITY.get)
+    pattern = re.compile('(?=(' + '|'.join(re.escape(kw) for kw in ordered) + '))')
+    return lambda text: (KEYWORD_PRIORITY[m.group(1)] for m in pattern.finditer(text))
+
+
+match_keywords = build_keyword_matcher()
+
+
 def get_category_fallback(description: str) -> tuple:
     """Fallback keyword-based categorization when ML model unavailable"""
-    description_lower = description.lower()
-    
-    # Food & Dining keywords
-    if any(kw in description_lower for kw in ['swiggy', 'zomato', 'restaurant', 'cafe', 'food', 'pizza', 
-                                               'burger', 'coffee', 'dinner', 'lunch', 'breakfast', 
-                                               'mcdonald', 'starbucks', 'domino', 'kfc', 'subway']):
-        return 'Food & Dining', 0.85
-    
-    # Transportation
-    if any(kw in description_lower for kw in ['uber', 'ola', 'rapido', 'metro', 'petrol', 'fuel', 
-                                               'gas station', 'parking', 'toll', 'cab', 'taxi', 
-                                               'bus', 'train', 'flight', 'airline']):
-        return 'Transportation', 0.85
-    
-    # Shopping
-    if any(kw in description_lower for kw in ['amazon', 'flipkart', 'myntra', 'shopping', 'store', 
-                                               'mart', 'purchase', 'order', 'delivery', 'grocery']):
-        return 'Shopping', 0.85
-    
-    # Bills & Utilities
-    if any(kw in description_lower for kw in ['electricity', 'water bill', 'internet', 'broadband', 
-                                               'mobile recharge', 'rent', 'maintenance', 'utility', 
-                                               'gas bill', 'phone bill', 'dth']):
-        return 'Bills & Utilities', 0.85
-    
-    # Entertainment
-    if any(kw in description_lower for kw in ['netflix', 'spotify', 'movie', 'cinema', 'game', 
-                                               'hotstar', 'prime', 'youtube', 'concert', 'show']):
-        return 'Entertainment', 0.85
-    
-    # Healthcare
-    if any(kw in description_lower for kw in ['hospital', 'doctor', 'pharmacy', 'medicine', 'medical', 
-                                               'clinic', 'health', 'dental', 'lab test']):
-        return 'Healthcare', 0.85
-    
-    # Education
-    if any(kw in description_lower for kw in ['course', 'tuition', 'school', 'college', 'book', 
-                                               'udemy', 'coursera', 'education', 'training']):
-        return 'Education', 0.85
-    
-    # Travel
-    if any(kw in description_lower for kw in ['hotel', 'booking', 'airbnb', 'makemytrip', 
-                                               'goibibo', 'travel', 'vacation', 'trip']):
-        return 'Travel', 0.85
+    priority = min(match_keywords(description.lower()), default=None)
+    if priority is not None:
+        return CATEGORY_KEYWORDS[priority][0], 0.85
     
     # Default
     return 'Others', 0.50
@@ -777,10 +1129,8 @@ def categorize_expense():
         
         # 3. Use ML model if available
         if expense_classifier is not None and expense_vectorizer is not None:
-            # Use ML model
-            input_tfidf = expense_vectorizer.transform([description])
-            prediction = expense_classifier.predict(input_tfidf)[0]
-            confidence = float(expense_classifier.predict_proba(input_tfidf).max() * 100)
+            # Use ML model (cached, batched with concurrent requests)
+            prediction, confidence = classify_expense(normalize_description(description))
         else:
             # Fallback to keyword matching
             prediction, confidence = get_category_fallback(description)
@@ -827,15 +1177,33 @@ def categorize_batch():
         if not transactions:
             return jsonify({'error': 'Transactions array is required'}), 400
         
+        use_ml = expense_classifier is not None and expense_vectorizer is not None
+        
+        if use_ml:
+            # Serve cache hits directly, then score all distinct misses
+            # with a single transform/predict_proba call
+            normalized = [normalize_description(txn.get('description', '')) for txn in transactions]
+            predictions = {}
+            misses = []
+            for description_norm in dict.fromkeys(normalized):
+                cached = expense_cache.get(description_norm)
+                if cached is None:
+                    misses.append(description_norm)
+                else:
+                    predictions[description_norm] = cached
+            
+            if misses:
+                for description_norm, result in zip(misses, categorize_expense_batch(misses)):
+                    predictions[description_norm] = result
+                    expense_cache.put(description_norm, result)
+        
         results = []
-        for txn in transactions:
+        for i, txn in enumerate(transactions):
             txn_id = txn.get('id', '')
             description = txn.get('description', '')
             
-            if expense_classifier is not None and expense_vectorizer is not None:
-                input_tfidf = expense_vectorizer.transform([description])
-                prediction = expense_classifier.predict(input_tfidf)[0]
-                confidence = float(expense_classifier.predict_proba(input_tfidf).max() * 100)
+            if use_ml:
+                prediction, confidence = predictions[normalized[i]]
             else:
                 prediction, confidence = get_category_fallback(description)
                 confidence = confidence * 100
@@ -872,4 +1240,6 @@ if __name__ == '__main__':
     print("Starting server on http://localhost:5001")
     print("="*50 + "\n")
     
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    # Threaded so concurrent requests can share micro-batches
+    # (production: gunicorn -c gunicorn.conf.py ml_api:app)
+    app.run(debug=True, host='0.0.0.0', port=5001, threaded=True)
@@ -3,17 +3,28 @@ Script to retrain the expense categorization model
 This will regenerate the expense_classifier_clean.pkl and tfidf_vectorizer_clean.pkl files
 """
 
+import argparse
+from joblib import Parallel, delayed, dump, effective_n_jobs, load
+import numpy as np
 import pandas as pd
-import pickle
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import ShuffleSplit, StratifiedShuffleSplit
+from sklearn.pipeline import Pipeline, make_pipeline
 import os
 
 # Get the directory where this script is located
 MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKUP_DIR = os.path.join(MODEL_DIR, 'backup', 'Smart-Expense-Categorizer-master')
 
+parser = argparse.ArgumentParser(description='Retrain the expense categorization model')
+parser.add_argument('--warm', action='store_true',
+                    help='Continue from the saved IDF weights and classifier instead of training from scratch')
+parser.add_argument('--save-matrix', action='store_true',
+                    help='Also write the training TF-IDF matrix to X_train_tfidf.npz')
+args = parser.parse_args()
+
 print("="*50)
 print("    Retraining Expense Categorization Model")
 print("="*50)
@@ -22,101 +33,250 @@ print("="*50)
 data_path = os.path.join(BACKUP_DIR, 'transactions_clean.csv')
 print(f"\n📂 Loading data from: {data_path}")
 
+# Read only the header first, so the full read can skip unused columns
 try:
-    df = pd.read_csv(data_path)
-    print(f"✅ Loaded {len(df)} transactions")
-    print(f"   Columns: {list(df.columns)}")
+    columns = pd.read_csv(data_path, nrows=0).columns
+    print(f"   Columns: {list(columns)}")
 except Exception as e:
     print(f"❌ Failed to load data: {e}")
     exit(1)
 
 # Identify the columns
 # Common column names: 'description', 'category', 'text', 'label'
-description_col = None
-category_col = None
-
-for col in df.columns:
-    col_lower = col.lower()
-    if 'desc' in col_lower or 'text' in col_lower or 'transaction' in col_lower:
-        description_col = col
-    if 'cat' in col_lower or 'label' in col_lower or 'class' in col_lower:
-        category_col = col
-
-if description_col is None:
-    # Try first column
-    description_col = df.columns[0]
-if category_col is None:
-    # Try second column
-    category_col = df.columns[1] if len(df.columns) > 1 else df.columns[0]
+columns_lower = columns.str.lower()
+desc_mask = columns_lower.str.contains('desc|text|transaction')
+cat_mask = columns_lower.str.contains('cat|label|class')
+
+# The last matching column wins (a leading 'transaction_id' must not shadow
+# 'description'); fall back to the first/second column when no name matches
+description_col = columns[desc_mask][-1] if desc_mask.any() else columns[0]
+category_col = columns[cat_mask][-1] if cat_mask.any() else (columns[1] if len(columns) > 1 else columns[0])
 
 print(f"\n📊 Using columns:")
 print(f"   Description: '{description_col}'")
 print(f"   Category: '{category_col}'")
 
+# Load just those two columns with PyArrow's multithreaded CSV reader
+try:
+    df = pd.read_csv(
+        data_path,
+        engine='pyarrow',
+        usecols=list(dict.fromkeys([description_col, category_col])),
+        dtype={description_col: 'string[pyarrow]', category_col: 'category'}
+    )
+    print(f"✅ Loaded {len(df)} transactions")
+except Exception as e:
+    print(f"❌ Failed to load data: {e}")
+    exit(1)
+
 # Clean the data
 df = df.dropna(subset=[description_col, category_col])
+df[category_col] = df[category_col].cat.remove_unused_categories()
 print(f"\n🧹 After cleaning: {len(df)} transactions")
 
 # Show category distribution
 print(f"\n📈 Category distribution:")
-for cat, count in df[category_col].value_counts().items():
-    print(f"   {cat}: {count}")
+category_counts = df[category_col].value_counts()
+print("\n".join(f"   {cat}: {count}" for cat, count in category_counts.items()))
 
 # Prepare the data
-X = df[description_col].astype(str)
-y = df[category_col].astype(str)
+# The columns were read as Arrow strings and a string categorical; only convert
+# (copying every row) if a fallback column came in with another dtype
+X = df[description_col]
+if not pd.api.types.is_string_dtype(X):
+    X = X.astype(str)
+y = df[category_col]
+if not pd.api.types.is_string_dtype(y.cat.categories):
+    y = y.astype(str)
+
+# Lowercase and collapse whitespace once with vectorized Arrow string kernels,
+# the same normalization ml_api applies before vectorizing, so the hasher can
+# skip its per-document lowercasing
+X = X.str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
 
 # Split data
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+# Stratify so minority categories land in both sets; that needs at least two
+# rows per category, otherwise fall back to a plain shuffle split
+splitter = StratifiedShuffleSplit if y.value_counts().min() >= 2 else ShuffleSplit
+train_idx, test_idx = next(splitter(n_splits=1, test_size=0.2, random_state=42).split(X, y))
+X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
 print(f"\n🔀 Split: {len(X_train)} train, {len(X_test)} test")
 
+# Encode labels once as integer codes (classes is sorted, like classifier.classes_)
+# Plain label values: a categorical y would return a CategoricalIndex whose
+# categories still list every category of the full column, shifting test codes
+# whenever a category is missing from the training split
+y_train_codes, classes = pd.factorize(y_train, sort=True)
+classes = np.asarray(classes)
+y_test_values = np.asarray(y_test)
+y_test_codes = pd.Index(classes).get_indexer(y_test_values)  # -1 for categories unseen in training
+seen = y_test_codes >= 0
+assert (classes[y_test_codes[seen]] == y_test_values[seen]).all(), "test labels misaligned with classes"
+
 # Create TF-IDF vectorizer
+# The hashing trick tokenizes in a single pass with no vocabulary dict; the
+# only fitted state left to pickle is the IDF vector of the transformer
 print("\n🔧 Training TF-IDF Vectorizer...")
-vectorizer = TfidfVectorizer(
-    max_features=5000,
-    ngram_range=(1, 2),
-    stop_words='english'
+vectorizer = make_pipeline(
+    HashingVectorizer(
+        n_features=2**18,
+        ngram_range=(1, 2),
+        stop_words='english',
+        alternate_sign=False,
+        lowercase=False,  # Descriptions are lowercased up front
+        norm=None,  # Raw counts; TfidfTransformer normalizes after IDF weighting
+        dtype=np.float32  # Half the bytes of float64
+    ),
+    TfidfTransformer(sublinear_tf=True)  # 1 + log(tf) damps repeated tokens
 )
-X_train_tfidf = vectorizer.fit_transform(X_train)
-X_test_tfidf = vectorizer.transform(X_test)
-print(f"   Vocabulary size: {len(vectorizer.vocabulary_)}")
+hasher, tfidf = vectorizer.named_steps['hashingvectorizer'], vectorizer.named_steps['tfidftransformer']
+
+# Rows are vectorized and fitted one mini-batch at a time, so the full
+# TF-IDF matrix of the training set is never held in memory
+BATCH_SIZE = 50_000
+N_EPOCHS = 5
+
+
+def hashed_batches(texts):
+    """Hash consecutive mini-batches of texts in parallel worker processes.
+    The hasher has no fitted state, so batches are independent; they are yielded
+    in order while the following ones are still being hashed."""
+    starts = range(0, len(texts), BATCH_SIZE)
+    n_jobs = max(1, min(effective_n_jobs(-1), len(starts)))
+    return Parallel(n_jobs=n_jobs, return_as='generator')(
+        delayed(hasher.transform)(texts[start:start + BATCH_SIZE]) for start in starts
+    )
+
+
+def tfidf_batches(texts, *columns):
+    """Yield the TF-IDF matrix of each consecutive mini-batch, followed by
+    the matching slice of every array in columns"""
+    for start, counts in zip(range(0, len(texts), BATCH_SIZE), hashed_batches(texts)):
+        # The hashed counts are a throwaway CSR buffer, so IDF scaling and
+        # normalization run in place on .data instead of allocating a copy
+        X_batch = tfidf.transform(counts, copy=False)
+        # Drop zero-weighted entries so the solver never iterates over them, and
+        # canonicalize (sorted, duplicate-free indices) for the sparse fast path
+        X_batch.eliminate_zeros()
+        X_batch.sum_duplicates()
+        assert X_batch.has_canonical_format
+        yield (X_batch, *(column[start:start + BATCH_SIZE] for column in columns))
+
+
+# Expense logs repeat the same descriptions many times: collapse identical
+# (description, category) rows into one row with its count, so each distinct
+# string is hashed once per pass
+train_rows = pd.DataFrame({'text': X_train.to_numpy(dtype=object), 'code': y_train_codes})
+row_counts = train_rows.value_counts(sort=False)
+train_texts = row_counts.index.get_level_values('text').to_numpy(dtype=object)
+train_codes = row_counts.index.get_level_values('code').to_numpy()
+train_weights = row_counts.to_numpy()
+test_texts = X_test.to_numpy(dtype=object)
+print(f"   Unique training rows: {len(train_texts)}")
+
+print(f"   Hashed features: {hasher.n_features}")
+
+# --warm reuses the IDF weights (and min_df/max_df pruning) of the saved
+# vectorizer when its hashing setup is unchanged, skipping the document
+# frequency pass for incremental retrains on mostly unchanged data
+vectorizer_path = os.path.join(MODEL_DIR, 'tfidf_vectorizer_clean.pkl')
+previous_vectorizer = load(vectorizer_path) if args.warm and os.path.exists(vectorizer_path) else None
+if (isinstance(previous_vectorizer, Pipeline)
+        and previous_vectorizer[0].get_params() == hasher.get_params()):
+    tfidf.idf_ = previous_vectorizer[-1].idf_
+    print("   Reusing IDF weights from the previous vectorizer")
+else:
+    # Document frequencies in one streaming pass (each unique row counts as often
+    # as it occurred); smoothed IDF as TfidfTransformer computes it
+    doc_freq = np.zeros(hasher.n_features, dtype=np.float64)
+    for start, counts in zip(range(0, len(train_texts), BATCH_SIZE), hashed_batches(train_texts)):
+        row_weights = np.repeat(train_weights[start:start + BATCH_SIZE], np.diff(counts.indptr))
+        doc_freq += np.bincount(counts.indices, weights=row_weights, minlength=hasher.n_features)
+    n_docs = len(X_train)
+    idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+
+    # Hashed columns have no vocabulary to prune, so apply min_df=2 / max_df=0.95
+    # through the IDF vector: a zero weight drops hapax and near-universal terms
+    # from every matrix, including the ones built at serving time
+    pruned = (doc_freq < 2) | (doc_freq > 0.95 * n_docs)
+    idf[pruned] = 0
+    tfidf.idf_ = idf.astype(np.float32)
+    print(f"   Active features: {int(((doc_freq > 0) & ~pruned).sum())}")
+tfidf.n_features_in_ = hasher.n_features
 
 # Train classifier
-print("\n🤖 Training Logistic Regression Classifier...")
-classifier = LogisticRegression(
-    max_iter=1000,
-    multi_class='multinomial',
-    solver='lbfgs',
-    random_state=42
-)
-classifier.fit(X_train_tfidf, y_train)
+print("\n🤖 Training SGD Logistic Regression Classifier...")
+# log_loss SGD touches only the nonzeros of the current mini-batch per step
+classifier = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+class_codes = np.arange(len(classes))
+
+# --warm continues from the previous weights when the label set and hashed
+# feature space are unchanged. t_ carries the step count over, so the 'optimal'
+# learning rate resumes its decay instead of restarting at its largest step
+classifier_path = os.path.join(MODEL_DIR, 'expense_classifier_clean.pkl')
+previous = load(classifier_path) if args.warm and os.path.exists(classifier_path) else None
+if (isinstance(previous, SGDClassifier)
+        and list(previous.classes_) == list(classes)
+        and previous.coef_.shape == (len(classes), hasher.n_features)):
+    classifier.coef_ = previous.coef_.copy()
+    classifier.intercept_ = previous.intercept_.copy()
+    classifier.t_ = previous.t_
+    print("   Warm-starting from the previous model")
+
+rng = np.random.default_rng(42)
+for epoch in range(N_EPOCHS):
+    # Reshuffle across batches each epoch; partial_fit shuffles within a batch
+    order = rng.permutation(len(train_texts))
+    for X_batch, y_batch, w_batch in tfidf_batches(train_texts[order], train_codes[order], train_weights[order]):
+        # Repeat each unique row's vector by its count rather than passing the
+        # count as sample_weight: in SGD a weight scales the step size, so a
+        # description seen thousands of times would become one huge update
+        rows = rng.permutation(np.repeat(np.arange(len(y_batch)), w_batch))
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch_rows = rows[start:start + BATCH_SIZE]
+            classifier.partial_fit(X_batch[batch_rows], y_batch[batch_rows], classes=class_codes)
+print(f"   Trained for {N_EPOCHS} epochs")
+
+
+def batched_accuracy(texts, labels, weights):
+    """Weighted accuracy accumulated over mini-batches"""
+    correct = sum(w_batch[classifier.predict(X_batch) == y_batch].sum()
+                  for X_batch, y_batch, w_batch in tfidf_batches(texts, labels, weights))
+    return correct / weights.sum()
+
 
 # Evaluate
-train_score = classifier.score(X_train_tfidf, y_train)
-test_score = classifier.score(X_test_tfidf, y_test)
+train_score = batched_accuracy(train_texts, train_codes, train_weights)
+test_score = batched_accuracy(test_texts, y_test_codes, np.ones(len(test_texts)))
 print(f"   Train accuracy: {train_score:.2%}")
 print(f"   Test accuracy: {test_score:.2%}")
 
+# Map the integer codes back to category names so predict() returns labels
+classifier.classes_ = np.asarray(classes)
+
 # Save models
 print("\n💾 Saving models...")
 
-vectorizer_path = os.path.join(MODEL_DIR, 'tfidf_vectorizer_clean.pkl')
-classifier_path = os.path.join(MODEL_DIR, 'expense_classifier_clean.pkl')
-
-with open(vectorizer_path, 'wb') as f:
-    pickle.dump(vectorizer, f)
+# lz4 keeps the hashed-width coef_ and idf_ arrays small on disk and fast to load
+dump(vectorizer, vectorizer_path, compress=('lz4', 3))
 print(f"   ✅ Saved: tfidf_vectorizer_clean.pkl")
 
-with open(classifier_path, 'wb') as f:
-    pickle.dump(classifier, f)
+dump(classifier, classifier_path, compress=('lz4', 3))
 print(f"   ✅ Saved: expense_classifier_clean.pkl")
 
+if args.save_matrix:
+    # Training streams the matrix batch by batch, so it is only assembled on request.
+    # Rows are the unique training descriptions; save_npz stores the raw CSR arrays
+    # and scipy.sparse.load_npz reads them back without unpickling
+    X_train_tfidf = sp.vstack([X_batch for X_batch, in tfidf_batches(train_texts)], format='csr')
+    sp.save_npz(os.path.join(MODEL_DIR, 'X_train_tfidf.npz'), X_train_tfidf, compressed=False)
+    print(f"   ✅ Saved: X_train_tfidf.npz")
+
 # Test the models by loading them back
 print("\n🔍 Verifying models...")
-with open(vectorizer_path, 'rb') as f:
-    loaded_vectorizer = pickle.load(f)
-with open(classifier_path, 'rb') as f:
-    loaded_classifier = pickle.load(f)
+loaded_vectorizer = load(vectorizer_path)
+loaded_classifier = load(classifier_path)
 
 # Test prediction
 test_descriptions = [
@@ -128,11 +288,10 @@ test_descriptions = [
 ]
 
 print("\n📋 Test Predictions:")
-for desc in test_descriptions:
-    tfidf = loaded_vectorizer.transform([desc])
-    pred = loaded_classifier.predict(tfidf)[0]
-    prob = loaded_classifier.predict_proba(tfidf).max()
-    print(f"   '{desc}' → {pred} ({prob:.1%})")
+tfidf = loaded_vectorizer.transform([desc.lower() for desc in test_descriptions])
+preds = loaded_classifier.predict(tfidf)
+probs = loaded_classifier.predict_proba(tfidf).max(axis=1)
+print("\n".join(f"   '{desc}' → {pred} ({prob:.1%})" for desc, pred, prob in zip(test_descriptions, preds, probs)))
 
 print("\n" + "="*50)
 print("    ✅ Model Retraining Complete!")